@@ -1,26 +1,117 @@
 import os
-import wave
-import contextlib
+import struct
 import sys
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 
-def get_wav_duration(filepath):
+# Number of bytes read from the start of a WAV file, enough for the chunks of a typical header
+HEADER_READ_SIZE = 512
+
+def _read_chunk_start(fd, header, offset):
+    """
+    Returns up to 20 bytes at offset: a chunk's id and size plus the start of its body.
+    Served from header when possible, otherwise with a seek and a short read.
+    """
+    if offset + 20 <= len(header):
+        return header[offset:offset + 20]
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, 20)
+
+def fast_wav_duration(filepath):
     """
-    Returns the duration of a WAV file in seconds.
+    Returns the duration of a WAV file in seconds, computed from its header alone.
+    The first HEADER_READ_SIZE bytes are read at once; chunks that start further in
+    (bext, iXML, JUNK, large LIST chunks) are skipped with seeks, never read.
     """
     try:
-        with contextlib.closing(wave.open(filepath, 'r')) as wf:
-            frames = wf.getnframes()
-            rate = wf.getframerate()
-            duration = frames / float(rate)
-            return duration
-    except wave.Error as e:
+        # O_BINARY keeps Windows from translating line endings in the header
+        fd = os.open(filepath, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            header = os.read(fd, HEADER_READ_SIZE)
+
+            if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+                raise ValueError("not a RIFF/WAVE file")
+
+            # Walk the chunks: the byte rate lives in 'fmt ', the payload size in 'data'
+            byte_rate = None
+            offset = 12
+            while True:
+                chunk = _read_chunk_start(fd, header, offset)
+                if len(chunk) < 8:
+                    raise ValueError("data chunk not found")
+                chunk_id, chunk_size = struct.unpack_from('<4sI', chunk)
+                if chunk_id == b'fmt ':
+                    byte_rate = struct.unpack_from('<I', chunk, 16)[0]
+                elif chunk_id == b'data':
+                    if not byte_rate:
+                        raise ValueError("missing or invalid fmt chunk")
+                    return chunk_size / byte_rate
+                offset += 8 + chunk_size + (chunk_size & 1)
+        finally:
+            os.close(fd)
+    except (ValueError, struct.error) as e:
         print(f"Error reading {filepath}: {e}")
         return None
     except Exception as e:
         print(f"Unexpected error with {filepath}: {e}")
         return None
 
+def iter_wav_files(directory, skip_directory=None):
+    """
+    Recursively yields os.DirEntry objects for the WAV files under directory.
+    Both paths must be absolute; skip_directory is not descended into.
+    """
+    if directory == skip_directory:
+        return
+    try:
+        # Read the listing up front so the handle is closed before recursing
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except OSError as e:
+        print(f"Failed to scan {directory}: {e}")
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from iter_wav_files(entry.path, skip_directory)
+        elif entry.is_file(follow_symlinks=False) and entry.name.lower().endswith('.wav'):
+            yield entry
+
+def _classify_and_act(entry, min_duration):
+    """
+    Reads the duration of a single WAV file and deletes it if it is shorter than min_duration.
+    Returns (filepath, duration_text) for files that should be moved, otherwise None.
+    """
+    filepath = entry.path
+    duration = fast_wav_duration(filepath)
+    
+    if duration is None:
+        print(f"Skipping file due to read error: {filepath}")
+        return None
+    
+    duration_text = f"{duration:.2f} seconds"
+
+    if duration < min_duration:
+        # Delete the file
+        try:
+            os.remove(filepath)
+            print(f"Deleted: {filepath} (Duration: {duration_text})")
+        except Exception as e:
+            print(f"Failed to delete {filepath}: {e}")
+        return None
+
+    return filepath, duration_text
+
+def _move_file(filepath, new_filepath, duration_text):
+    """
+    Moves a qualifying WAV file to its new name in the final folder.
+    """
+    try:
+        shutil.move(filepath, new_filepath)
+        print(f"Moved and renamed: {filepath} --> {new_filepath} (Duration: {duration_text})")
+    except Exception as e:
+        print(f"Failed to move {filepath}: {e}")
+
 def process_wav_files(source_directory, min_duration=30, final_folder_path=r"C:\Users\phatt\OneDrive\Desktop\code\yt_down\final"):
     """
     Processes WAV files in the source directory:
@@ -39,52 +130,39 @@ def process_wav_files(source_directory, min_duration=30, final_folder_path=r"C:\
     # Create the final folder if it doesn't exist
     os.makedirs(final_folder_path, exist_ok=True)
     
-    # Initialize a counter for renaming
-    vocal_counter = 1
-    
-    # Iterate over files in the source directory
-    for root, dirs, files in os.walk(source_directory):
-        # Avoid processing files in the final folder
-        if os.path.abspath(root) == os.path.abspath(final_folder_path):
-            continue
-        
-        for file in files:
-            if file.lower().endswith('.wav'):
-                filepath = os.path.join(root, file)
-                duration = get_wav_duration(filepath)
-                
-                if duration is None:
-                    print(f"Skipping file due to read error: {filepath}")
-                    continue
-                
-                if duration < min_duration or duration > min_duration:
-                    # Delete the file
-                    try:
-                        os.remove(filepath)
-                        print(f"Deleted: {filepath} (Duration: {duration:.2f} seconds)")
-                    except Exception as e:
-                        print(f"Failed to delete {filepath}: {e}")
-                else:
-                    # Define the new filename
-                    new_filename = f"vocal{vocal_counter}.wav"
-                    new_filepath = os.path.join(final_folder_path, new_filename)
-                    
-                    # Ensure the new filename does not already exist
-                    while os.path.exists(new_filepath):
-                        vocal_counter += 1
-                        new_filename = f"vocal{vocal_counter}.wav"
-                        new_filepath = os.path.join(final_folder_path, new_filename)
-                    
-                    try:
-                        shutil.move(filepath, new_filepath)
-                        print(f"Moved and renamed: {filepath} --> {new_filepath} (Duration: {duration:.2f} seconds)")
-                        vocal_counter += 1
-                    except Exception as e:
-                        print(f"Failed to move {filepath}: {e}")
+    # Collect the WAV files in the source directory, skipping the final folder
+    # Start from an absolute path so every DirEntry.path can be compared without abspath calls
+    final_folder_abspath = os.path.abspath(final_folder_path)
+    entries = list(iter_wav_files(os.path.abspath(source_directory), final_folder_abspath))
+
+    # The work is I/O bound, so run many more threads than there are cores
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Read durations and delete short files concurrently; map keeps the scan order
+        keep = [result for result in executor.map(_classify_and_act, entries, repeat(min_duration)) if result is not None]
+
+        # Assign the new names sequentially so numbering stays deterministic
+        moves = []
+        vocal_counter = 1
+        # Join the final folder only once, the new paths are then built by concatenation
+        final_prefix = os.path.join(final_folder_path, 'vocal')
+        for filepath, duration_text in keep:
+            new_filepath = f"{final_prefix}{vocal_counter}.wav"
+            
+            # Ensure the new filename does not already exist
+            while os.path.exists(new_filepath):
+                vocal_counter += 1
+                new_filepath = f"{final_prefix}{vocal_counter}.wav"
+
+            moves.append((filepath, new_filepath, duration_text))
+            vocal_counter += 1
+
+        # Move the qualifying files concurrently
+        list(executor.map(lambda move: _move_file(*move), moves))
     
     print("\nOperation Completed.")
-    print(f"All WAV files shorter than or longer than {min_duration} seconds have been deleted.")
-    print(f"All WAV files equal to {min_duration} seconds have been moved to '{final_folder_path}' and renamed accordingly.")
+    print(f"All WAV files shorter than {min_duration} seconds have been deleted.")
+    print(f"All WAV files of {min_duration} seconds or longer have been moved to '{final_folder_path}' and renamed accordingly.")
 
 def main():
     # Prompt the user for the source directory path
@@ -15,19 +15,45 @@ warnings.filterwarnings('ignore', category=FutureWarning)
 
 import yt_dlp
 from spleeter.separator import Separator
-from pydub import AudioSegment
+from spleeter.audio.adapter import AudioAdapter
+import numpy as np
 import shutil
-import glob
-import time
+import hashlib
+import re
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import struct
+
+# directory where downloaded audio and separated vocals are kept between runs
+CACHE_DIR = 'cache'
+
+# function to build the cache path of a file derived from a youtube url
+def cache_path(youtube_url, suffix):
+    """
+    returns the cache path for a file derived from a youtube url.
+
+    :param youtube_url: the youtube video url.
+    :param suffix: suffix of the cached file, e.g. '.mp3'.
+    :return: the path of the cached file, named after the sha1 of the url.
+    """
+    key = hashlib.sha1(youtube_url.encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, f'{key}{suffix}')
 
 # function for downloading audio
 def download_audio(youtube_url, output_dir):
+    # reuse the mp3 from an earlier run if there is one
+    cached_mp3 = cache_path(youtube_url, '.mp3')
+    if os.path.exists(cached_mp3) and os.path.getsize(cached_mp3) > 0:
+        return cached_mp3
+
     # create the output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
     # define yt-dlp options for downloading the best audio
     ydl_opts = {
-        'format': 'bestaudio/best', # download the best audio
+        # prefer audio-only streams, only fall back to the best format with audio in it as a last resort
+        'format': 'bestaudio[ext=m4a]/bestaudio/bestaudio*',
+        'noplaylist': True, # only download the video itself, never the playlist it belongs to
 
         # defines the output filename and directory for the downloaded file
         'outtmpl': os.path.join(output_dir, 'downloaded_audio.%(ext)s'), 
@@ -53,36 +79,88 @@ def download_audio(youtube_url, output_dir):
     if not os.path.exists(downloaded_mp3):
         raise FileNotFoundError(f"{downloaded_mp3} not found after download.")
 
-    # return the path to the downloaded mp3
-    return downloaded_mp3
+    # keep the mp3 in the cache so a rerun does not download it again
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    shutil.move(downloaded_mp3, cached_mp3)
 
-# function to extract vocals from the audio using spleeter
-def extract_vocals(input_audio, output_dir):
-    # initialize spleeter's separator with a 2-stem model (vocals and accompaniment)
-    separator = Separator('spleeter:2stems')  # splits into 2 stems : vocal and music
+    # return the path to the cached mp3
+    return cached_mp3
 
-    # perform the separation and store in the output directory
-    separator.separate_to_file(input_audio, output_dir)
+# sample rate the spleeter models work at
+SAMPLE_RATE = 44100
 
-    # wait for 5 seconds to ensure files are written
-    time.sleep(5)
+# shared spleeter separator, created on first use
+_SEPARATOR = None
 
-    # extract the file name from the path. for example, 
-    # os.path.basename('C:/Users/ExampleUser/Music/track1.mp3') -> 'track1.mp3'
-    # os.path.splitext('track1.mp3') -> ('track1', '.mp3')
-    # base_filename -> 'track1'
-    base_filename = os.path.splitext(os.path.basename(input_audio))[0]
+# function to get the shared spleeter separator
+def _get_separator():
+    """
+    returns the shared spleeter separator, loading the model on the first call only.
 
-    # construct the path to the extracted vocals wav file
-    vocals_wav_path = os.path.join(output_dir, base_filename, 'vocals.wav')
-    # 'C:/Users/ExampleUser/ProcessedAudio/track1/vocals.wav'
+    :return: the spleeter separator instance.
+    """
+    global _SEPARATOR
+    if _SEPARATOR is None:
+        # initialize spleeter's separator with a 2-stem model (vocals and accompaniment)
+        _SEPARATOR = Separator('spleeter:2stems')  # splits into 2 stems : vocal and music
+    return _SEPARATOR
 
-    # check if the vocals wav file exists, raise error if not found
-    if not os.path.exists(vocals_wav_path):
-        raise FileNotFoundError(f"Vocals WAV file not found at {vocals_wav_path}.")
+# number of samples converted to 16-bit pcm at a time
+CONVERT_BLOCK_SAMPLES = 1 << 20
 
-    # return the path to the extracted vocals wav file
-    return vocals_wav_path
+# function to convert a float waveform to 16-bit pcm
+def to_pcm16(samples):
+    """
+    converts a float waveform to little-endian 16-bit pcm the way ffmpeg does when spleeter
+    writes wav files: scaled by 32768, rounded to the nearest integer and clipped to the int16
+    range. the conversion runs in blocks, so no full-size float temporaries are created
+    next to the waveform.
+
+    :param samples: float waveform of shape (samples,) or (samples, channels).
+    :return: an int16 array of the same shape.
+    """
+    pcm = np.empty(samples.shape, dtype='<i2')
+    for start in range(0, len(samples), CONVERT_BLOCK_SAMPLES):
+        block = samples[start:start + CONVERT_BLOCK_SAMPLES]
+        # scale, round and clip one block at a time
+        pcm[start:start + CONVERT_BLOCK_SAMPLES] = np.clip(np.rint(block * 32768), -32768, 32767)
+    return pcm
+
+# function to extract vocals from the audio using spleeter
+def extract_vocals(input_audio, cache_file=None):
+    """
+    separates the vocals from an audio file in memory, only the optional cache file is written to disk.
+
+    :param input_audio: path to the input audio file.
+    :param cache_file: optional .npy file the vocals are saved to and reused from on later runs.
+    :return: the vocals as 16-bit pcm, an int16 array of shape (samples, channels) at SAMPLE_RATE.
+    """
+    # reuse the vocals separated by an earlier run, memory-mapped instead of loaded
+    if cache_file is not None and os.path.exists(cache_file):
+        return np.load(cache_file, mmap_mode='r')
+
+    # decode the audio the same way spleeter's separate_to_file does
+    waveform, _ = AudioAdapter.default().load(input_audio, sample_rate=SAMPLE_RATE)
+    # perform the separation with the shared separator
+    prediction = _get_separator().separate(waveform)
+    # keep only the vocals stem as 16-bit pcm, half the size of the float32 stem on disk and in memory
+    vocals = to_pcm16(prediction['vocals'])
+
+    if cache_file is not None:
+        # a bare file name has no directory to create
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        # write to a temporary name first so an interrupted run never leaves a truncated cache file
+        temp_file = cache_file + '.tmp'
+        with open(temp_file, 'wb') as f:
+            np.save(f, vocals)
+        os.replace(temp_file, cache_file)
+
+    return vocals
+
+# matches split vocal filenames such as 'vocal12.wav', ignoring case like windows does
+_VOCAL_RE = re.compile(r'^vocal(\d+)\.wav$', re.IGNORECASE)
 
 # function to determine the next vocal file number based on existing files
 def get_next_vocal_number(output_dir='split_vocals'):
@@ -92,94 +170,150 @@ def get_next_vocal_number(output_dir='split_vocals'):
     :param output_dir: directory where split vocal files are saved.
     :return: the next available vocal number as an integer.
     """
-    # check if the output directory exists, create it if not
-    if not os.path.exists(output_dir):
+    # list the output directory in a single pass, create it if it does not exist
+    try:
+        entries = os.scandir(output_dir)
+    except FileNotFoundError:
         os.makedirs(output_dir)
         return 1  # start from 1 if directory does not exist
 
-    # find all files in the output directory that match the pattern 'vocal*.wav'
-    existing_files = glob.glob(os.path.join(output_dir, 'vocal*.wav'))
-    
     # initialize the maximum number found to 0
     max_number = 0
-    
-    # wait for 5 seconds to ensure all files are accessible
-    time.sleep(5)
-    
-    # iterate over each existing file to find the highest vocal number
-    for file in existing_files:
-        # get the base name of the file (e.g., 'vocal12.wav')
-        basename = os.path.basename(file)
-        
-        # split the base name into name and extension (e.g., ('vocal12', '.wav'))
-        name, _ = os.path.splitext(basename)
-        
-        # extract the numeric part from the name (e.g., '12' from 'vocal12')
-        number_part = ''.join(filter(str.isdigit, name))
-        
-        # check if the extracted part is a digit
-        if number_part.isdigit():
-            # convert the numeric string to an integer
-            number = int(number_part)
-            
-            # update max_number if the current number is greater
-            if number > max_number:
-                max_number = number
-                
+
+    with entries as it:
+        # find the highest number among the files named like 'vocal12.wav'
+        for entry in it:
+            match = _VOCAL_RE.match(entry.name)
+            if match:
+                number = int(match.group(1))
+                if number > max_number:
+                    max_number = number
+
     # return the next available number by adding 1 to the max found
     return max_number + 1
 
-# function to split a wav file into multiple chunks of specified length
-def split_wav_file(input_wav, output_dir='split_vocals', chunk_length_sec=30, start_number=1):
+# function to build a canonical 44-byte wav header for raw pcm data
+def build_wav_header(nchannels, sampwidth, framerate, data_size):
+    """
+    builds a canonical 44-byte riff/wave header for a block of raw pcm data.
+
+    :param nchannels: number of audio channels.
+    :param sampwidth: sample width in bytes.
+    :param framerate: sample rate in hz.
+    :param data_size: size of the pcm payload in bytes.
+    :return: the header as bytes.
+    """
+    # bytes per frame (one sample for every channel)
+    block_align = nchannels * sampwidth
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, nchannels, framerate, framerate * block_align, block_align, sampwidth * 8,
+        b'data', data_size,
+    )
+
+# number of threads used to write the chunks of one file
+CHUNK_WRITE_WORKERS = 8
+
+# function to write a single chunk as a standalone wav file
+def write_chunk(output_path, header, pcm, start, end):
+    """
+    writes pcm[start:end] preceded by its wav header to a new file.
+
+    :param output_path: path of the wav file to create.
+    :param header: the wav header for the chunk.
+    :param pcm: buffer holding the pcm data (bytes or a uint8 array).
+    :param start: offset of the first byte of the chunk in pcm.
+    :param end: offset one past the last byte of the chunk in pcm.
     """
-    splits a wav file into multiple chunks of specified length with sequential naming.
+    with open(output_path, 'wb') as out:
+        out.write(header)
+        out.write(pcm[start:end])
 
-    :param input_wav: path to the input wav file.
+# function to write a block of pcm data as numbered wav chunks of specified length
+def write_chunks(pcm, nchannels, sampwidth, framerate, output_dir='split_vocals', chunk_length_sec=30, vocal_ids=None):
+    """
+    writes the pcm data in pcm as wav chunks of specified
+    length with sequential naming.
+
+    :param pcm: buffer holding the pcm data (bytes or a uint8 array).
+    :param nchannels: number of audio channels.
+    :param sampwidth: sample width in bytes.
+    :param framerate: sample rate in hz.
     :param output_dir: directory where split files will be saved.
     :param chunk_length_sec: length of each chunk in seconds.
-    :param start_number: the starting number for naming the split files.
-    :return: the next available vocal number after splitting.
+    :param vocal_ids: iterator handing out the numbers for naming the split files, counts from 1 if omitted.
+    :return: the number of chunks written.
     """
-    # load the wav file using pydub
-    audio = AudioSegment.from_wav(input_wav)
-    
-    # calculate the total length of the audio in seconds
-    total_length_sec = len(audio) / 1000  # pydub works in milliseconds
-    
-    # determine the number of chunks needed, add one if there's a remainder
-    num_chunks = int(total_length_sec // chunk_length_sec) + (1 if total_length_sec % chunk_length_sec > 0 else 0)
+    # the whole buffer is pcm data
+    data_size = len(pcm)
+    # calculate how many bytes of pcm data make up one chunk
+    bytes_per_chunk = chunk_length_sec * framerate * nchannels * sampwidth
+    # every full chunk shares the same header, so build it only once
+    chunk_header = build_wav_header(nchannels, sampwidth, framerate, bytes_per_chunk)
 
     # ensure the output directory exists
     os.makedirs(output_dir, exist_ok=True)
-    # wait for 5 seconds to ensure directory is ready
-    time.sleep(5)
-    # initialize the current number for naming
-    current_number = start_number
+    # join the directory only once, chunk paths are then built by concatenation
+    output_prefix = os.path.join(output_dir, '')
+    # number the chunks from 1 unless the caller shares its own counter
+    if vocal_ids is None:
+        vocal_ids = itertools.count(1)
 
-    # iterate over the number of chunks to create each segment
+    # determine the number of chunks needed, add one if there's a remainder
+    num_chunks = data_size // bytes_per_chunk + (1 if data_size % bytes_per_chunk > 0 else 0)
+
+    # lay out every chunk up front so the numbering stays sequential
+    output_filenames = []
+    output_paths = []
+    headers = []
+    starts = []
+    ends = []
     for i in range(num_chunks):
-        # calculate the start time in milliseconds
-        start_ms = i * chunk_length_sec * 1000
-        # calculate the end time in milliseconds
-        end_ms = start_ms + chunk_length_sec * 1000
-        # extract the audio segment from start to end
-        chunk = audio[start_ms:end_ms]
+        # calculate the byte range of the chunk inside the buffer
+        start = i * bytes_per_chunk
+        end = min(start + bytes_per_chunk, data_size)
+
+        # only the last chunk can be shorter and needs its own header
+        header = chunk_header if end - start == bytes_per_chunk else build_wav_header(nchannels, sampwidth, framerate, end - start)
 
         # define the output filename with sequential numbering
-        output_filename = f'vocal{current_number}.wav'
+        output_filename = f'vocal{next(vocal_ids)}.wav'
+        output_filenames.append(output_filename)
         # create the full path for the output file
-        output_path = os.path.join(output_dir, output_filename)
+        output_paths.append(output_prefix + output_filename)
+        headers.append(header)
+        starts.append(start)
+        ends.append(end)
 
-        # export the chunk as a wav file
-        chunk.export(output_path, format='wav')
-        # print a message indicating successful export
+    # write the chunks concurrently, each one is an independent file
+    with ThreadPoolExecutor(max_workers=CHUNK_WRITE_WORKERS) as executor:
+        list(executor.map(write_chunk, output_paths, headers, itertools.repeat(pcm), starts, ends))
+
+    # print a message for every exported chunk, in order
+    for output_filename in output_filenames:
         print(f"Exported {output_filename}")
 
-        # increment the vocal number for the next chunk
-        current_number += 1
+    # return the number of chunks written
+    return num_chunks
 
-    # return the next available vocal number after splitting
-    return current_number
+# function to split an in-memory vocals waveform into multiple chunks of specified length
+def split_vocals(vocals, sample_rate=SAMPLE_RATE, output_dir='split_vocals', chunk_length_sec=30, vocal_ids=None):
+    """
+    splits 16-bit vocals into wav chunks of specified length with sequential naming.
+
+    :param vocals: 16-bit pcm of shape (samples, channels), as returned by extract_vocals.
+    :param sample_rate: sample rate of the waveform in hz.
+    :param output_dir: directory where split files will be saved.
+    :param chunk_length_sec: length of each chunk in seconds.
+    :param vocal_ids: iterator handing out the numbers for naming the split files, counts from 1 if omitted.
+    :return: the number of chunks written.
+    """
+    # the vocals already are interleaved 16-bit pcm, only make sure they sit in one contiguous block
+    pcm = np.ascontiguousarray(vocals, dtype='<i2')
+    # view the samples as raw bytes without copying them
+    pcm_bytes = pcm.reshape(-1).view(np.uint8)
+    return write_chunks(pcm_bytes, pcm.shape[1], 2, sample_rate, output_dir, chunk_length_sec, vocal_ids)
 
 # function to clean up temporary files
 def clean_up(temp_dir):
@@ -199,61 +333,111 @@ def clean_up(temp_dir):
             # print an error message if cleanup fails
             print(f"Failed to clean up temporary files: {e}")
 
-# function to process a single youtube video
-def process_youtube_video(youtube_url, split_output_dir, current_number):
+# number of videos downloaded at the same time
+DOWNLOAD_WORKERS = 4
+
+# function to wait for a background split and report its outcome
+def wait_for_split(youtube_url, split):
     """
-    processes a single youtube video: downloads audio, extracts vocals, splits into chunks.
+    waits for a background split to finish and prints whether it succeeded.
 
-    :param youtube_url: the youtube video url.
+    :param youtube_url: the youtube video url the split belongs to.
+    :param split: the future of the split.
+    """
+    try:
+        split.result()
+        # print a message indicating successful splitting
+        print(f"  Splitting of {youtube_url} completed successfully.")
+    except Exception as e:
+        # print an error message indicating what went wrong
+        print(f"  An error occurred while splitting {youtube_url}: {e}")
+
+# function to process several youtube videos as a pipeline
+def process_batch(youtube_urls, split_output_dir, vocal_ids):
+    """
+    processes youtube videos as a three-stage pipeline: downloads audio, extracts vocals, splits into chunks.
+    downloads run in parallel, vocals are extracted one video at a time on the shared separator
+    (tensorflow can't run the same graph from several threads), and each video is split in the
+    background while the next one is being separated.
+
+    :param youtube_urls: the youtube video urls.
     :param split_output_dir: directory to save all split vocal files.
-    :param current_number: the current vocal number to start naming from.
-    :return: the updated current vocal number after processing.
+    :param vocal_ids: iterator handing out the numbers for naming the split files.
     """
+    # process each url once, duplicates would download onto the same cache file
+    youtube_urls = list(dict.fromkeys(youtube_urls))
+
     # define the temporary directory for processing
     temp_dir = 'temp_processing'
     try:
         # create the temporary directory if it doesn't exist
         os.makedirs(temp_dir, exist_ok=True)
-        # print a message indicating which url is being processed
-        print(f"\nProcessing URL: {youtube_url}")
-
-        # step 1: download audio
-        print("  Downloading audio from YouTube...")
-        # download the audio and get the path to the downloaded mp3
-        downloaded_mp3 = download_audio(youtube_url, os.path.join(temp_dir, 'audio'))
-        # print a message indicating successful download
-        print("  Audio downloaded successfully.")
-        # wait for 5 seconds
-        time.sleep(5)
-        
-        # step 2: extract vocals using spleeter
-        print("  Extracting vocals...")
-        # extract the vocals and get the path to the vocals wav
-        vocals_wav_path = extract_vocals(downloaded_mp3, os.path.join(temp_dir, 'vocals'))
-        # print a message indicating where vocals are saved
-        print(f"  Vocals extracted and saved to '{vocals_wav_path}'.")
-        # wait for 5 seconds
-        time.sleep(5)
-        
-        # step 3: split the wav file into 30-second segments with sequential naming
-        print("  Splitting the WAV file into 30-second segments...")
-        # split the wav file and update the current_number
-        current_number = split_wav_file(vocals_wav_path, output_dir=split_output_dir, chunk_length_sec=30, start_number=current_number)
-        # print a message indicating successful splitting
-        print("  Splitting completed successfully.")
 
-    except Exception as e:
-        # get the error message
-        error_message = str(e)
-        # print an error message indicating what went wrong
-        print(f"  An error occurred while processing {youtube_url}: {error_message}")
+        # a single split worker keeps the numbering of every video contiguous and in url order
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as download_executor, \
+                ThreadPoolExecutor(max_workers=1) as split_executor:
+            try:
+                # step 1: download audio, every video gets its own directory
+                print("Downloading audio from YouTube...")
+                audio_dirs = [os.path.join(temp_dir, f'audio{i}') for i in range(len(youtube_urls))]
+                vocal_caches = [cache_path(youtube_url, '.vocals.npy') for youtube_url in youtube_urls]
+                # videos whose vocals are already cached don't need their audio at all
+                downloads = [
+                    None if os.path.exists(vocal_cache) else download_executor.submit(download_audio, youtube_url, audio_dir)
+                    for youtube_url, audio_dir, vocal_cache in zip(youtube_urls, audio_dirs, vocal_caches)
+                ]
+
+                # the split still running in the background, at most one is pending at a time
+                pending_split = None
+                for youtube_url, audio_dir, vocal_cache, download in zip(youtube_urls, audio_dirs, vocal_caches, downloads):
+                    # print a message indicating which url is being processed
+                    print(f"\nProcessing URL: {youtube_url}")
+                    try:
+                        if download is None:
+                            # the vocals come from the cache, so there is nothing to download or separate
+                            vocals = extract_vocals(None, vocal_cache)
+                            # print a message indicating the vocals were reused
+                            print("  Vocals loaded from the cache.")
+                        else:
+                            # wait for the download of this video to finish
+                            downloaded_mp3 = download.result()
+                            # print a message indicating successful download
+                            print("  Audio downloaded successfully.")
+
+                            # step 2: extract vocals using spleeter
+                            print("  Extracting vocals...")
+                            # extract the vocals into memory and save them to the cache
+                            vocals = extract_vocals(downloaded_mp3, vocal_cache)
+                            # print a message indicating successful extraction
+                            print("  Vocals extracted successfully.")
+                    except Exception as e:
+                        # print an error message indicating what went wrong
+                        print(f"  An error occurred while processing {youtube_url}: {e}")
+                        continue
+
+                    # the download directory is no longer needed once the mp3 is cached
+                    clean_up(audio_dir)
+
+                    # step 3: split the vocals into 30-second segments with sequential naming
+                    print("  Splitting the vocals into 30-second segments...")
+                    # wait for the previous split, so at most two vocals arrays are held in memory
+                    if pending_split is not None:
+                        wait_for_split(*pending_split)
+                    # split the vocals in the background, taking the file numbers from the shared counter
+                    pending_split = (youtube_url, split_executor.submit(split_vocals, vocals, SAMPLE_RATE, split_output_dir, 30, vocal_ids))
+                    # drop the reference so the array is freed as soon as the split is done
+                    del vocals
+
+                # wait for the last split to finish
+                if pending_split is not None:
+                    wait_for_split(*pending_split)
+            finally:
+                # on an error or ctrl-c, drop the downloads that haven't started instead of waiting for all of them
+                download_executor.shutdown(wait=False, cancel_futures=True)
     finally:
         # clean up temporary files regardless of success or failure
         clean_up(temp_dir)
 
-    # return the updated current number for the next vocal file
-    return current_number
-
 # main function to orchestrate the processing
 def main():
     # define the directory to save split vocal files
@@ -261,25 +445,27 @@ def main():
     # define the error log file
     error_log = 'error_log.txt'
 
-    # prompt the user to enter a youtube url
-    print("Enter a YouTube video URL:")
-    youtube_url = input("URL: ").strip()
+    # prompt the user to enter one or more youtube urls
+    print("Enter one or more YouTube video URLs, separated by spaces:")
+    youtube_urls = input("URLs: ").split()
 
     # if no url was entered, print a message and exit
-    if not youtube_url:
+    if not youtube_urls:
         print("No URL was entered. Exiting the program.")
         return
 
     # get the next available vocal number based on existing split vocal files
-    current_number = get_next_vocal_number(split_output_dir)
+    start_number = get_next_vocal_number(split_output_dir)
     # print a message indicating where numbering starts
-    print(f"Starting vocal numbering from {current_number}.")
+    print(f"Starting vocal numbering from {start_number}.")
+    # hand out the following numbers from a single counter instead of rescanning the directory
+    vocal_ids = itertools.count(start_number)
 
-    # process the youtube video and update the current_number
-    current_number = process_youtube_video(youtube_url, split_output_dir, current_number)
+    # process the youtube videos
+    process_batch(youtube_urls, split_output_dir, vocal_ids)
 
     # after processing, print a summary message
-    print("\nThe video has been processed.")
+    print(f"\n{len(youtube_urls)} video(s) have been processed.")
     print(f"All split vocal files are saved in the '{split_output_dir}' directory.")
 
 # entry point of the script
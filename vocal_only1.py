@@ -1,7 +1,7 @@
 import os
 import warnings
 import csv
-import time
+import struct
 
 # Set environment variables to suppress TensorFlow logs and disable GPU
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'  # Suppress TensorFlow logs
@@ -17,9 +17,15 @@ warnings.filterwarnings('ignore', category=FutureWarning)
 
 import yt_dlp
 from spleeter.separator import Separator
-from pydub import AudioSegment
+from spleeter.audio.adapter import AudioAdapter
+import numpy as np
+from scipy.signal import resample_poly
 import shutil
-import glob
+import hashlib
+import re
+import itertools
+import math
+from concurrent.futures import ThreadPoolExecutor
 
 # ----------------------- Helper Functions -----------------------
 
@@ -30,21 +36,39 @@ def format_time(ms):
     :param ms: Time in milliseconds.
     :return: Formatted time string.
     """
-    seconds = ms // 1000
-    minutes = seconds // 60
-    hours = minutes // 60
-    seconds = seconds % 60
-    minutes = minutes % 60
-    return f"{int(hours):02}:{int(minutes):02}:{int(seconds):02}"
+    minutes, seconds = divmod(int(ms) // 1000, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{seconds:02}"
+
+# Directory where downloaded audio and separated vocals are kept between runs
+CACHE_DIR = 'cache'
+
+# Function to build the cache path of a file derived from a YouTube URL
+def cache_path(youtube_url, suffix):
+    """
+    Returns the cache path for a file derived from a YouTube URL.
+
+    :param youtube_url: The YouTube video URL.
+    :param suffix: Suffix of the cached file, e.g. '.mp3'.
+    :return: The path of the cached file, named after the SHA-1 of the URL.
+    """
+    key = hashlib.sha1(youtube_url.encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, f'{key}{suffix}')
 
 # Function to download audio
 def download_audio(youtube_url, output_dir):
+    # Reuse the mp3 from an earlier run if there is one
+    cached_mp3 = cache_path(youtube_url, '.mp3')
+    if os.path.exists(cached_mp3) and os.path.getsize(cached_mp3) > 0:
+        return cached_mp3
+
     # Create the output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
     # Define yt-dlp options for downloading the best audio
     ydl_opts = {
-        'format': 'bestaudio/best',  # Download the best audio
+        'format': 'bestaudio[ext=m4a]/bestaudio/bestaudio*',  # Prefer audio-only streams, muxed files only as a last resort
+        'noplaylist': True,  # Only download the video itself, never the playlist it belongs to
         'outtmpl': os.path.join(output_dir, 'downloaded_audio.%(ext)s'), 
         'postprocessors': [{
             'key': 'FFmpegExtractAudio',  # Extract audio using ffmpeg
@@ -67,42 +91,91 @@ def download_audio(youtube_url, output_dir):
     if not os.path.exists(downloaded_mp3):
         raise FileNotFoundError(f"{downloaded_mp3} not found after download.")
 
-    # Return the path to the downloaded mp3
-    return downloaded_mp3
+    # Keep the mp3 in the cache so a rerun does not download it again
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    shutil.move(downloaded_mp3, cached_mp3)
+
+    # Return the path to the cached mp3
+    return cached_mp3
+
+# Sample rate the Spleeter models work at
+SAMPLE_RATE = 44100
+
+# Sample rate of the split chunks, half the model rate is plenty for 5-second training clips
+OUTPUT_SAMPLE_RATE = 22050
+
+# Shared Spleeter separator, created on first use
+_SEPARATOR = None
+
+# Function to get the shared Spleeter separator
+def _get_separator():
+    """
+    Returns the shared Spleeter separator, loading the model on the first call only.
+
+    :return: The Spleeter separator instance.
+    """
+    global _SEPARATOR
+    if _SEPARATOR is None:
+        # Initialize Spleeter's separator with a 2-stem model (vocals and accompaniment)
+        _SEPARATOR = Separator('spleeter:2stems')  # Splits into 2 stems: vocals and music
+    return _SEPARATOR
+
+# Number of samples converted to 16-bit PCM at a time
+CONVERT_BLOCK_SAMPLES = 1 << 20
+
+# Function to convert a float waveform to 16-bit PCM
+def to_pcm16(samples):
+    """
+    Converts a float waveform to little-endian 16-bit PCM the way ffmpeg does when Spleeter
+    writes WAV files: scaled by 32768, rounded to the nearest integer and clipped to the int16
+    range. The conversion runs in blocks, so no full-size float temporaries are created
+    next to the waveform.
+
+    :param samples: Float waveform of shape (samples,) or (samples, channels).
+    :return: An int16 array of the same shape.
+    """
+    pcm = np.empty(samples.shape, dtype='<i2')
+    for start in range(0, len(samples), CONVERT_BLOCK_SAMPLES):
+        block = samples[start:start + CONVERT_BLOCK_SAMPLES]
+        # Scale, round and clip one block at a time
+        pcm[start:start + CONVERT_BLOCK_SAMPLES] = np.clip(np.rint(block * 32768), -32768, 32767)
+    return pcm
 
 # Function to extract vocals from the audio using Spleeter
-def extract_vocals(input_audio, output_dir):
-    # Initialize Spleeter's separator with a 2-stem model (vocals and accompaniment)
-    separator = Separator('spleeter:2stems')  # Splits into 2 stems: vocals and music
-
-    # Perform the separation and store in the output directory
-    separator.separate_to_file(input_audio, output_dir)
-
-    # Wait until the vocals file is created or timeout
-    vocals_wav_path = construct_vocals_path(input_audio, output_dir)
-    wait_for_file(vocals_wav_path, timeout=30)
-
-    # Check if the vocals wav file exists, raise error if not found
-    if not os.path.exists(vocals_wav_path):
-        raise FileNotFoundError(f"Vocals WAV file not found at {vocals_wav_path}.")
-
-    # Return the path to the extracted vocals wav file
-    return vocals_wav_path
-
-# Helper function to construct the vocals wav path
-def construct_vocals_path(input_audio, output_dir):
-    base_filename = os.path.splitext(os.path.basename(input_audio))[0]
-    vocals_wav_path = os.path.join(output_dir, base_filename, 'vocals.wav')
-    return vocals_wav_path
-
-# Function to wait for a file to exist
-def wait_for_file(filepath, timeout=30):
-    """Wait until a file exists or timeout is reached."""
-    start_time = time.time()
-    while not os.path.exists(filepath):
-        if time.time() - start_time > timeout:
-            raise TimeoutError(f"File {filepath} not found within {timeout} seconds.")
-        time.sleep(0.5)
+def extract_vocals(input_audio, cache_file=None):
+    """
+    Separates the vocals from an audio file in memory, only the optional cache file is written to disk.
+
+    :param input_audio: Path to the input audio file.
+    :param cache_file: Optional .npy file the vocals are saved to and reused from on later runs.
+    :return: The vocals as 16-bit PCM, an int16 array of shape (samples, channels) at SAMPLE_RATE.
+    """
+    # Reuse the vocals separated by an earlier run, memory-mapped instead of loaded
+    if cache_file is not None and os.path.exists(cache_file):
+        return np.load(cache_file, mmap_mode='r')
+
+    # Decode the audio the same way Spleeter's separate_to_file does
+    waveform, _ = AudioAdapter.default().load(input_audio, sample_rate=SAMPLE_RATE)
+    # Perform the separation with the shared separator
+    prediction = _get_separator().separate(waveform)
+    # Keep only the vocals stem as 16-bit PCM, half the size of the float32 stem on disk and in memory
+    vocals = to_pcm16(prediction['vocals'])
+
+    if cache_file is not None:
+        # A bare file name has no directory to create
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary name first so an interrupted run never leaves a truncated cache file
+        temp_file = cache_file + '.tmp'
+        with open(temp_file, 'wb') as f:
+            np.save(f, vocals)
+        os.replace(temp_file, cache_file)
+
+    return vocals
+
+# Matches split vocal filenames such as 'vocal12.wav', ignoring case like Windows does
+_VOCAL_RE = re.compile(r'^vocal(\d+)\.wav$', re.IGNORECASE)
 
 # Function to determine the next vocal file number based on existing files
 def get_next_vocal_number(output_dir='split_vocals'):
@@ -112,114 +185,201 @@ def get_next_vocal_number(output_dir='split_vocals'):
     :param output_dir: Directory where split vocal files are saved.
     :return: The next available vocal number as an integer.
     """
-    # Check if the output directory exists, create it if not
-    if not os.path.exists(output_dir):
+    # List the output directory in a single pass, create it if it does not exist
+    try:
+        entries = os.scandir(output_dir)
+    except FileNotFoundError:
         os.makedirs(output_dir)
         return 1  # Start from 1 if directory does not exist
 
-    # Find all files in the output directory that match the pattern 'vocal*.wav'
-    existing_files = glob.glob(os.path.join(output_dir, 'vocal*.wav'))
-    
     # Initialize the maximum number found to 0
     max_number = 0
-    
-    # Iterate over each existing file to find the highest vocal number
-    for file in existing_files:
-        # Get the base name of the file (e.g., 'vocal12.wav')
-        basename = os.path.basename(file)
-        
-        # Split the base name into name and extension (e.g., ('vocal12', '.wav'))
-        name, _ = os.path.splitext(basename)
-        
-        # Extract the numeric part from the name (e.g., '12' from 'vocal12')
-        number_part = ''.join(filter(str.isdigit, name))
-        
-        # Check if the extracted part is a digit
-        if number_part.isdigit():
-            # Convert the numeric string to an integer
-            number = int(number_part)
-            
-            # Update max_number if the current number is greater
-            if number > max_number:
-                max_number = number
-                
+
+    with entries as it:
+        # Find the highest number among the files named like 'vocal12.wav'
+        for entry in it:
+            match = _VOCAL_RE.match(entry.name)
+            if match:
+                number = int(match.group(1))
+                if number > max_number:
+                    max_number = number
+
     # Return the next available number by adding 1 to the max found
     return max_number + 1
 
-# Function to split a wav file into multiple chunks of specified length
-def split_wav_file(input_wav, output_dir='split_vocals', chunk_length_sec=5, start_number=1):
+# Function to build a canonical 44-byte WAV header for raw PCM data
+def build_wav_header(nchannels, sampwidth, framerate, data_size):
     """
-    Splits a wav file into multiple chunks of specified length with sequential naming.
-    Also records the time range of each chunk in a separate CSV file.
+    Builds a canonical 44-byte RIFF/WAVE header for a block of raw PCM data.
 
-    :param input_wav: Path to the input wav file.
+    :param nchannels: Number of audio channels.
+    :param sampwidth: Sample width in bytes.
+    :param framerate: Sample rate in Hz.
+    :param data_size: Size of the PCM payload in bytes.
+    :return: The header as bytes.
+    """
+    # Bytes per frame (one sample for every channel)
+    block_align = nchannels * sampwidth
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, nchannels, framerate, framerate * block_align, block_align, sampwidth * 8,
+        b'data', data_size,
+    )
+
+# Number of threads used to write the chunks of one file
+CHUNK_WRITE_WORKERS = 8
+
+# Function to write a single chunk as a standalone WAV file
+def write_chunk(output_path, header, pcm, start, end):
+    """
+    Writes pcm[start:end] preceded by its WAV header to a new file.
+
+    :param output_path: Path of the WAV file to create.
+    :param header: The WAV header for the chunk.
+    :param pcm: Buffer holding the PCM data (bytes or a uint8 array).
+    :param start: Offset of the first byte of the chunk in pcm.
+    :param end: Offset one past the last byte of the chunk in pcm.
+    """
+    with open(output_path, 'wb') as out:
+        out.write(header)
+        out.write(pcm[start:end])
+
+# Function to write a block of PCM data as numbered WAV chunks of specified length
+def write_chunks(pcm, nchannels, sampwidth, framerate, output_dir='split_vocals', chunk_length_sec=5, vocal_ids=None):
+    """
+    Writes the PCM data in pcm as WAV chunks of specified
+    length with sequential naming, and records the time range of each chunk in a CSV file.
+
+    :param pcm: Buffer holding the PCM data (bytes or a uint8 array).
+    :param nchannels: Number of audio channels.
+    :param sampwidth: Sample width in bytes.
+    :param framerate: Sample rate in Hz.
     :param output_dir: Directory where split files will be saved.
     :param chunk_length_sec: Length of each chunk in seconds.
-    :param start_number: The starting number for naming the split files.
-    :return: The next available vocal number after splitting.
+    :param vocal_ids: Iterator handing out the numbers for naming the split files, counts from 1 if omitted.
+    :return: The number of chunks written.
     """
-    # Load the wav file using pydub
-    audio = AudioSegment.from_wav(input_wav)
-    
-    # Calculate the total length of the audio in milliseconds
-    total_length_ms = len(audio)  # pydub works in milliseconds
-    
-    # Determine the number of chunks needed, add one if there's a remainder
-    num_chunks = int(total_length_ms // (chunk_length_sec * 1000)) + (1 if total_length_ms % (chunk_length_sec * 1000) > 0 else 0)
+    # The whole buffer is PCM data
+    data_size = len(pcm)
+    # Calculate how many bytes of PCM data make up one chunk
+    block_align = nchannels * sampwidth
+    bytes_per_chunk = chunk_length_sec * framerate * block_align
+    # Every full chunk shares the same header, so build it only once
+    chunk_header = build_wav_header(nchannels, sampwidth, framerate, bytes_per_chunk)
 
     # Ensure the output directory exists
     os.makedirs(output_dir, exist_ok=True)
-    # Wait for 5 seconds to ensure directory is ready
-    time.sleep(5)
-    # Initialize the current number for naming
-    current_number = start_number
+    # Join the directory only once, chunk paths are then built by concatenation
+    output_prefix = os.path.join(output_dir, '')
+    # Number the chunks from 1 unless the caller shares its own counter
+    if vocal_ids is None:
+        vocal_ids = itertools.count(1)
 
     # Define the CSV file path
     csv_file_path = os.path.join(output_dir, 'time_ranges.csv')
     
-    # Check if the CSV file exists to determine if headers are needed
-    file_exists = os.path.isfile(csv_file_path)
-    
-    with open(csv_file_path, 'a', newline='', encoding='utf-8') as csv_file:
+    # Use a large buffer so the rows reach the disk in as few writes as possible
+    with open(csv_file_path, 'a+', newline='', buffering=262144, encoding='utf-8') as csv_file:
         csv_writer = csv.writer(csv_file)
         
-        # Write headers if the file does not exist
-        if not file_exists:
+        # Append mode starts at the end of the file, so position 0 means it is new or empty
+        if csv_file.tell() == 0:
             csv_writer.writerow(['Filename', 'Start Time', 'End Time'])
+
+        # Calculate the total length of the audio in milliseconds
+        total_length_ms = (data_size // block_align) * 1000 // framerate
+
+        # Determine the number of chunks needed, add one if there's a remainder
+        num_chunks = data_size // bytes_per_chunk + (1 if data_size % bytes_per_chunk > 0 else 0)
+
+        # Each chunk ends where the next one starts, so format every boundary only once
+        chunk_length_ms = chunk_length_sec * 1000
+        boundary_strs = [format_time(ms) for ms in range(0, num_chunks * chunk_length_ms, chunk_length_ms)]
+        boundary_strs.append(format_time(total_length_ms))
         
-        # Iterate over the number of chunks to create each segment
+        # Lay out every chunk up front so the numbering and CSV rows stay sequential
+        rows = []
+        output_paths = []
+        headers = []
+        starts = []
+        ends = []
         for i in range(num_chunks):
-            # Calculate the start time in milliseconds
-            start_ms = i * chunk_length_sec * 1000
-            # Calculate the end time in milliseconds
-            end_ms = start_ms + chunk_length_sec * 1000
-            # Ensure the end time does not exceed the total length
-            end_ms = min(end_ms, total_length_ms)
-            # Extract the audio segment from start to end
-            chunk = audio[start_ms:end_ms]
-
-            # Format the start and end times
-            start_time_str = format_time(start_ms)
-            end_time_str = format_time(end_ms)
+            # Calculate the byte range of the chunk inside the buffer
+            start = i * bytes_per_chunk
+            end = min(start + bytes_per_chunk, data_size)
+
+            # Only the last chunk can be shorter and needs its own header
+            header = chunk_header if end - start == bytes_per_chunk else build_wav_header(nchannels, sampwidth, framerate, end - start)
 
             # Define the output filename with sequential numbering
-            output_filename = f'vocal{current_number}.wav'
+            output_filename = f'vocal{next(vocal_ids)}.wav'
+            # Record the preformatted start and end times of the chunk
+            rows.append([output_filename, boundary_strs[i], boundary_strs[i + 1]])
             # Create the full path for the output file
-            output_path = os.path.join(output_dir, output_filename)
+            output_paths.append(output_prefix + output_filename)
+            headers.append(header)
+            starts.append(start)
+            ends.append(end)
+
+        # Write the chunks concurrently, each one is an independent file
+        with ThreadPoolExecutor(max_workers=CHUNK_WRITE_WORKERS) as executor:
+            list(executor.map(write_chunk, output_paths, headers, itertools.repeat(pcm), starts, ends))
 
-            # Export the chunk as a wav file
-            chunk.export(output_path, format='wav')
+        for output_filename, start_time_str, end_time_str in rows:
             # Print a message indicating successful export
             print(f"Exported {output_filename} (from {start_time_str} to {end_time_str})")
 
-            # Write the row to the CSV file
-            csv_writer.writerow([output_filename, start_time_str, end_time_str])
+        # Write all the rows to the CSV file at once
+        csv_writer.writerows(rows)
+
+    # Return the number of chunks written
+    return num_chunks
 
-            # Increment the vocal number for the next chunk
-            current_number += 1
+# Number of input frames downmixed and resampled at a time
+RESAMPLE_BLOCK_FRAMES = 1 << 20
 
-    # Return the next available vocal number after splitting
-    return current_number
+# Function to split an in-memory vocals waveform into multiple chunks of specified length
+def split_vocals(vocals, sample_rate=SAMPLE_RATE, output_dir='split_vocals', chunk_length_sec=5, vocal_ids=None):
+    """
+    Splits 16-bit vocals into mono WAV chunks of specified length with sequential naming.
+    The vocals are downmixed and resampled to OUTPUT_SAMPLE_RATE block by block before chunking,
+    so the only full-length array built is the 16-bit mono output.
+    Also records the time range of each chunk in a separate CSV file.
+
+    :param vocals: 16-bit PCM of shape (samples, channels), as returned by extract_vocals.
+    :param sample_rate: Sample rate of the waveform in Hz.
+    :param output_dir: Directory where split files will be saved.
+    :param chunk_length_sec: Length of each chunk in seconds.
+    :param vocal_ids: Iterator handing out the numbers for naming the split files, counts from 1 if omitted.
+    :return: The number of chunks written.
+    """
+    # Reduce the rate change to lowest terms (44.1 kHz -> 22.05 kHz is a clean 1:2)
+    rate_gcd = math.gcd(OUTPUT_SAMPLE_RATE, sample_rate)
+    up, down = OUTPUT_SAMPLE_RATE // rate_gcd, sample_rate // rate_gcd
+    # Blocks and their context are whole multiples of down, so each one maps onto whole output samples
+    block_frames = -(-RESAMPLE_BLOCK_FRAMES // down) * down
+    # Input frames on either side of a block that reach into it through resample_poly's filter
+    context_frames = -(-(10 * max(up, down) // up + 1) // down) * down
+
+    num_frames = len(vocals)
+    pcm = np.empty(-(-num_frames * up // down), dtype='<i2')
+    for start in range(0, num_frames, block_frames):
+        # Downmix the block plus its context to mono and scale back to [-1, 1) for the resampler
+        context_start = max(start - context_frames, 0)
+        mono = vocals[context_start:start + block_frames + context_frames].mean(axis=1, dtype=np.float32)
+        mono /= 32768
+        # Resample with a polyphase filter, the context makes the block match resampling the whole track
+        if up != down:
+            mono = resample_poly(mono, up, down)
+        # Keep the output samples of the block itself and convert them to 16-bit PCM
+        out_start = start * up // down
+        out_end = min((start + block_frames) * up // down, len(pcm))
+        offset = (start - context_start) * up // down
+        pcm[out_start:out_end] = to_pcm16(mono[offset:offset + out_end - out_start])
+    # View the samples as raw bytes without copying them
+    pcm_bytes = pcm.view(np.uint8)
+    return write_chunks(pcm_bytes, 1, 2, OUTPUT_SAMPLE_RATE, output_dir, chunk_length_sec, vocal_ids)
 
 # Function to clean up temporary files
 def clean_up(temp_dir):
@@ -239,61 +399,111 @@ def clean_up(temp_dir):
             # Print an error message if cleanup fails
             print(f"Failed to clean up temporary files: {e}")
 
-# Function to process a single YouTube video
-def process_youtube_video(youtube_url, split_output_dir, current_number):
+# Number of videos downloaded at the same time
+DOWNLOAD_WORKERS = 4
+
+# Function to wait for a background split and report its outcome
+def wait_for_split(youtube_url, split):
     """
-    Processes a single YouTube video: downloads audio, extracts vocals, splits into chunks.
+    Waits for a background split to finish and prints whether it succeeded.
 
-    :param youtube_url: The YouTube video URL.
+    :param youtube_url: The YouTube video URL the split belongs to.
+    :param split: The future of the split.
+    """
+    try:
+        split.result()
+        # Print a message indicating successful splitting
+        print(f"  Splitting of {youtube_url} completed successfully.")
+    except Exception as e:
+        # Print an error message indicating what went wrong
+        print(f"  An error occurred while splitting {youtube_url}: {e}")
+
+# Function to process several YouTube videos as a pipeline
+def process_batch(youtube_urls, split_output_dir, vocal_ids):
+    """
+    Processes YouTube videos as a three-stage pipeline: downloads audio, extracts vocals, splits into chunks.
+    Downloads run in parallel, vocals are extracted one video at a time on the shared separator
+    (TensorFlow can't run the same graph from several threads), and each video is split in the
+    background while the next one is being separated.
+
+    :param youtube_urls: The YouTube video URLs.
     :param split_output_dir: Directory to save all split vocal files.
-    :param current_number: The current vocal number to start naming from.
-    :return: The updated current vocal number after processing.
+    :param vocal_ids: Iterator handing out the numbers for naming the split files.
     """
+    # Process each URL once, duplicates would download onto the same cache file
+    youtube_urls = list(dict.fromkeys(youtube_urls))
+
     # Define the temporary directory for processing
     temp_dir = 'temp_processing'
     try:
         # Create the temporary directory if it doesn't exist
         os.makedirs(temp_dir, exist_ok=True)
-        # Print a message indicating which URL is being processed
-        print(f"\nProcessing URL: {youtube_url}")
-
-        # Step 1: Download audio
-        print("  Downloading audio from YouTube...")
-        # Download the audio and get the path to the downloaded mp3
-        downloaded_mp3 = download_audio(youtube_url, os.path.join(temp_dir, 'audio'))
-        # Print a message indicating successful download
-        print("  Audio downloaded successfully.")
-        # Wait for 5 seconds
-        time.sleep(5)
-        
-        # Step 2: Extract vocals using Spleeter
-        print("  Extracting vocals...")
-        # Extract the vocals and get the path to the vocals wav
-        vocals_wav_path = extract_vocals(downloaded_mp3, os.path.join(temp_dir, 'vocals'))
-        # Print a message indicating where vocals are saved
-        print(f"  Vocals extracted and saved to '{vocals_wav_path}'.")
-        # Wait for 5 seconds
-        time.sleep(5)
-        
-        # Step 3: Split the wav file into 5-second segments with sequential naming
-        print("  Splitting the WAV file into 5-second segments...")
-        # Split the wav file and update the current_number
-        current_number = split_wav_file(vocals_wav_path, output_dir=split_output_dir, chunk_length_sec=5, start_number=current_number)
-        # Print a message indicating successful splitting
-        print("  Splitting completed successfully.")
 
-    except Exception as e:
-        # Get the error message
-        error_message = str(e)
-        # Print an error message indicating what went wrong
-        print(f"  An error occurred while processing {youtube_url}: {error_message}")
+        # A single split worker keeps the numbering of every video contiguous and in URL order
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as download_executor, \
+                ThreadPoolExecutor(max_workers=1) as split_executor:
+            try:
+                # Step 1: Download audio, every video gets its own directory
+                print("Downloading audio from YouTube...")
+                audio_dirs = [os.path.join(temp_dir, f'audio{i}') for i in range(len(youtube_urls))]
+                vocal_caches = [cache_path(youtube_url, '.vocals.npy') for youtube_url in youtube_urls]
+                # Videos whose vocals are already cached don't need their audio at all
+                downloads = [
+                    None if os.path.exists(vocal_cache) else download_executor.submit(download_audio, youtube_url, audio_dir)
+                    for youtube_url, audio_dir, vocal_cache in zip(youtube_urls, audio_dirs, vocal_caches)
+                ]
+
+                # The split still running in the background, at most one is pending at a time
+                pending_split = None
+                for youtube_url, audio_dir, vocal_cache, download in zip(youtube_urls, audio_dirs, vocal_caches, downloads):
+                    # Print a message indicating which URL is being processed
+                    print(f"\nProcessing URL: {youtube_url}")
+                    try:
+                        if download is None:
+                            # The vocals come from the cache, so there is nothing to download or separate
+                            vocals = extract_vocals(None, vocal_cache)
+                            # Print a message indicating the vocals were reused
+                            print("  Vocals loaded from the cache.")
+                        else:
+                            # Wait for the download of this video to finish
+                            downloaded_mp3 = download.result()
+                            # Print a message indicating successful download
+                            print("  Audio downloaded successfully.")
+
+                            # Step 2: Extract vocals using Spleeter
+                            print("  Extracting vocals...")
+                            # Extract the vocals into memory and save them to the cache
+                            vocals = extract_vocals(downloaded_mp3, vocal_cache)
+                            # Print a message indicating successful extraction
+                            print("  Vocals extracted successfully.")
+                    except Exception as e:
+                        # Print an error message indicating what went wrong
+                        print(f"  An error occurred while processing {youtube_url}: {e}")
+                        continue
+
+                    # The download directory is no longer needed once the mp3 is cached
+                    clean_up(audio_dir)
+
+                    # Step 3: Split the vocals into 5-second segments with sequential naming
+                    print("  Splitting the vocals into 5-second segments...")
+                    # Wait for the previous split, so at most two vocals arrays are held in memory
+                    if pending_split is not None:
+                        wait_for_split(*pending_split)
+                    # Split the vocals in the background, taking the file numbers from the shared counter
+                    pending_split = (youtube_url, split_executor.submit(split_vocals, vocals, SAMPLE_RATE, split_output_dir, 5, vocal_ids))
+                    # Drop the reference so the array is freed as soon as the split is done
+                    del vocals
+
+                # Wait for the last split to finish
+                if pending_split is not None:
+                    wait_for_split(*pending_split)
+            finally:
+                # On an error or Ctrl-C, drop the downloads that haven't started instead of waiting for all of them
+                download_executor.shutdown(wait=False, cancel_futures=True)
     finally:
         # Clean up temporary files regardless of success or failure
         clean_up(temp_dir)
 
-    # Return the updated current number for the next vocal file
-    return current_number
-
 # Main function to orchestrate the processing
 def main():
     # Define the directory to save split vocal files
@@ -301,25 +511,27 @@ def main():
     # Define the error log file (optional, since logging is configured)
     error_log = 'error_log.txt'
 
-    # Prompt the user to enter a YouTube URL
-    print("Enter a YouTube video URL:")
-    youtube_url = input("URL: ").strip()
+    # Prompt the user to enter one or more YouTube URLs
+    print("Enter one or more YouTube video URLs, separated by spaces:")
+    youtube_urls = input("URLs: ").split()
 
     # If no URL was entered, print a message and exit
-    if not youtube_url:
+    if not youtube_urls:
         print("No URL was entered. Exiting the program.")
         return
 
-    # Get the next available vocal number based on existing split vocal files   
-    current_number = get_next_vocal_number(split_output_dir)
+    # Get the next available vocal number based on existing split vocal files
+    start_number = get_next_vocal_number(split_output_dir)
     # Print a message indicating where numbering starts
-    print(f"Starting vocal numbering from {current_number}.")
+    print(f"Starting vocal numbering from {start_number}.")
+    # Hand out the following numbers from a single counter instead of rescanning the directory
+    vocal_ids = itertools.count(start_number)
 
-    # Process the YouTube video and update the current_number
-    current_number = process_youtube_video(youtube_url, split_output_dir, current_number)
+    # Process the YouTube videos
+    process_batch(youtube_urls, split_output_dir, vocal_ids)
 
     # After processing, print a summary message
-    print("\nThe video has been processed.")
+    print(f"\n{len(youtube_urls)} video(s) have been processed.")
     print(f"All split vocal files are saved in the '{split_output_dir}' directory.")
     print(f"Time ranges for each file are recorded in '{os.path.join(split_output_dir, 'time_ranges.csv')}'.")
     print("CSV file includes the following columns: Filename, Start Time, End Time.")